@@ -1,3 +1,5 @@
+import queue
+import threading
 import numpy as np
     
 def validate_stability(length, time, nx, nt, alpha):
@@ -150,6 +152,168 @@ def apply_boundary_conditions(matrix):
 
     return matrix
 
+def _crank_nicolson(length, nx, time, nt, alpha, function_temperature):
+    """
+    Validate the configuration and set up the Crank-Nicolson solver.
+    Returns the spatial grid and a generator of the (t, state) steps.
+    """
+    validate_stability(length, time, nx, nt, alpha)
+
+    x = np.linspace(0, length, num=nx)
+    t = np.linspace(0, time, num=nt)
+
+    def steps():
+        state = np.zeros(nx)
+
+        for i in range(nx):
+            state[i] = function_temperature(x[i], length)
+
+        state[0] = state[-1] = 0
+
+        r = calculate_r(length, time, nx, nt, alpha)
+        
+        A, B = create_matrices(nx, r)
+        
+        A = apply_boundary_conditions(A)
+        B = apply_boundary_conditions(B)
+
+        #a copy is yielded so that a consumer modifying its array cannot corrupt the next step
+        yield t[0], state.copy()
+
+        for i in range(1, nt):
+            d = B @ state
+            d[0] = d[-1] = 0
+            state = np.linalg.solve(A, d)
+            yield t[i], state.copy()
+
+    return x, steps()
+
+def heat_equation_CN_steps(length, nx, time, nt, alpha, function_temperature):
+    """
+    Step by step version of the Crank-Nicolson solver: it returns a generator that yields
+    the temperature profile at each time step as soon as it is computed, keeping only the
+    current one in memory. The stability condition is checked when the function is called.
+    
+    Parameters
+    ----------
+        length : float
+                length of the rod.
+        nx : int
+            spatial steps.
+        time : float
+              evolution time.
+        nt : int
+            time steps.
+        alpha : float
+               diffusivity coefficient of the medium.
+        function_temperature : function
+                    Function that defines the initial temperature distribution along the rod.
+                    It takes two arguments:
+                        - x : float, the spatial position along the rod.
+                        - length : float, the length of the rod.
+                    It should return a float representing the initial temperature at position x.
+        
+    Returns
+    -------
+        steps : generator
+               yields (t, state) for each of the nt time steps, where t is the time of the
+               step and state the temperature along the rod at time t, with nx points.
+
+    Raises
+    ------
+    ValueError
+        if the stability condition is not respected.
+    """
+    _, steps = _crank_nicolson(length, nx, time, nt, alpha, function_temperature)
+
+    return steps
+
+def run_pipeline(steps, consumers, buffer_size=0):
+    """
+    Feed every (t, state) produced by a step generator to a list of consumers.
+
+    Parameters
+    ----------
+        steps : iterable
+               (t, state) pairs, e.g. the generator returned by heat_equation_CN_steps.
+        consumers : list of functions
+                   each one is called as consumer(t, state) for every step, in order.
+                   Writers, reducers, plot updaters and monitors all share this interface.
+                   All the consumers receive the same state array, so they must not modify it.
+        buffer_size : int
+                     if 0 the solver advances only when all consumers have returned.
+                     If greater than 0 the solver runs in a background thread and can be
+                     at most buffer_size steps ahead of the consumers, so that I/O and
+                     analysis overlap with compute while a slow consumer still holds it back.
+
+    Returns
+    -------
+        t : float
+           time of the last step (None if there were no steps).
+        state : array
+               temperature of the last step (None if there were no steps).
+    """
+    if buffer_size < 0:
+        raise ValueError(f"Invalid buffer_size={buffer_size}. It must be >= 0.")
+
+    if buffer_size > 0:
+        steps = _buffered_steps(steps, buffer_size)
+
+    t, state = None, None
+    try:
+        for t, state in steps:
+            for consumer in consumers:
+                consumer(t, state)
+    finally:
+        #stop the background producer as well if a consumer raised
+        if buffer_size > 0:
+            steps.close()
+
+    return t, state
+
+def _buffered_steps(steps, buffer_size):
+    """
+    Run the step generator in a background thread, passing the steps through a
+    bounded queue: the producer blocks when the queue is full.
+    """
+    done = object()
+    buffer = queue.Queue(maxsize=buffer_size)
+    stop = threading.Event()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for step in steps:
+                if not put(step):
+                    return
+            put(done)
+        except BaseException as error:
+            put(error)
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+
+    try:
+        while True:
+            item = buffer.get()
+            if item is done:
+                break
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        #release the producer if the consumers stopped early
+        stop.set()
+        producer.join()
+
 def heat_equation_CN(length, nx, time, nt, alpha, function_temperature):
     """
     The function calculates the numerical solution of the heat equation using Crank-Nicolson method.
@@ -181,29 +345,38 @@ def heat_equation_CN(length, nx, time, nt, alpha, function_temperature):
            temperature calculated with the Crank-Nicolson method, dimensions [nx, nt].
     """
 
-    validate_stability(length, time, nx, nt, alpha)
-
-    x = np.linspace(0, length, num=nx)
+    x, steps = _crank_nicolson(length, nx, time, nt, alpha, function_temperature)
     w = np.zeros([nx, nt])
 
-    for i in range(nx):
-        w[i, 0] = function_temperature(x[i], length)
+    for i, (_, state) in enumerate(steps):
+        w[:, i] = state
 
-    w[0, :] = w[-1, :] = 0
+    return x, w
 
-    r = calculate_r(length, time, nx, nt, alpha)
-    
-    A, B = create_matrices(nx, r)
-    
-    A = apply_boundary_conditions(A)
-    B = apply_boundary_conditions(B)
+def analytical_temperature(x, t, length, alpha):
+    """
+    Evaluate the analytical solution of the 1D heat equation at a single time.
 
-    for i in range(1, nt):
-        d = B @ w[:, i-1]
-        d[0] = d[-1] = 0
-        w[:, i] = np.linalg.solve(A, d)
+    Parameters
+    ----------
+        x : array
+           spatial coordinates along the rod.
+        t : float
+           time of the evaluation.
+        length : float
+                length of the rod.
+        alpha : float
+               diffusivity coefficient of the medium.
 
-    return x, w
+    Returns
+    -------
+    profile : array
+             temperature along the rod at time t, with zero at both ends.
+    """
+    profile = np.sin(np.pi * x / length) * np.exp(-alpha * (np.pi / length)**2 * t)
+    profile[0] = profile[-1] = 0
+
+    return profile
 
 def heat_equation_analytical(length, nx, time, nt, alpha):
     """
@@ -237,7 +410,62 @@ def heat_equation_analytical(length, nx, time, nt, alpha):
     x = np.linspace(0, length, num=nx)
     
     for i in range(nt):
-        wa[:, i] = np.sin(np.pi * x / length) * np.exp(-alpha * (np.pi / length)**2 * t[i])
-        wa[0, i] = wa[-1, i] = 0
+        wa[:, i] = analytical_temperature(x, t[i], length, alpha)
         
     return x, wa
+
+def analytical_error_metrics(length, nx, alpha):
+    """
+    Create a consumer for run_pipeline that compares each numerical step with the
+    analytical solution evaluated at the same time, without storing either of them.
+
+    Parameters
+    ----------
+        length : float
+                length of the rod.
+        nx : int
+            spatial steps.
+        alpha : float
+               diffusivity coefficient of the medium.
+
+    Returns
+    -------
+        accumulate : function
+                    consumer called as accumulate(t, state).
+        report : function
+                returns the error report of the steps seen so far, a dict with:
+                    - t : array, times of the steps.
+                    - max_abs_error : float, maximum absolute error over all steps
+                      (nan if any step contains nan).
+                    - l2_error : array, L2 norm of the error at each step.
+                    - relative_error : array, L2 error at each step divided by the
+                      L2 norm of the analytical solution (nan where that norm is 0).
+    """
+    x = np.linspace(0, length, num=nx)
+    times = []
+    l2_errors = []
+    relative_errors = []
+    max_abs_error = 0.0
+
+    def accumulate(t, state):
+        nonlocal max_abs_error
+        exact = analytical_temperature(x, t, length, alpha)
+        error = state - exact
+        l2_error = np.linalg.norm(error)
+        exact_norm = np.linalg.norm(exact)
+
+        times.append(t)
+        l2_errors.append(l2_error)
+        relative_errors.append(l2_error / exact_norm if exact_norm > 0 else np.nan)
+        #np.maximum keeps a nan from a broken step instead of dropping it
+        max_abs_error = np.maximum(max_abs_error, np.max(np.abs(error)))
+
+    def report():
+        return {
+            "t": np.array(times),
+            "max_abs_error": float(max_abs_error),
+            "l2_error": np.array(l2_errors),
+            "relative_error": np.array(relative_errors),
+        }
+
+    return accumulate, report
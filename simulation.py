@@ -1,9 +1,47 @@
 import configparser
 import argparse
 import numpy as np
-from function import heat_equation_CN, heat_equation_analytical, function_temperature, check_stability
+from function import (heat_equation_CN_steps, heat_equation_analytical, function_temperature, check_stability,
+                      run_pipeline, analytical_error_metrics)
 from plot import plot_solutions, plot_surface_solution
 
+def npy_writer(path, nx, nt):
+    """
+    Create a consumer for run_pipeline that writes each step into a .npy file as it arrives.
+
+    Parameters
+    ----------
+        path : str
+              path of the .npy file, it will contain an array of dimensions [nx, nt].
+              The .npy extension is appended if it is missing, as np.save does.
+        nx : int
+            spatial steps.
+        nt : int
+            time steps.
+
+    Returns
+    -------
+        write : function
+               consumer called as write(t, state), storing state in the next column of the file.
+        w : array
+           memory-mapped view of the file, complete once all the nt steps have been written.
+    """
+    #same naming rule as np.save
+    if not path.endswith('.npy'):
+        path += '.npy'
+
+    w = np.lib.format.open_memmap(path, mode='w+', dtype=np.float64, shape=(nx, nt))
+    column = 0
+
+    def write(t, state):
+        nonlocal column
+        w[:, column] = state
+        column += 1
+        if column == nt:
+            w.flush()
+
+    return write, w
+
 def process_configuration(config_file):
     """
     Processes a given configuration file.
@@ -17,22 +55,30 @@ def process_configuration(config_file):
                              * time (float): total simulation time.
                              * nt_values (list of int): list for the time discretization.
                              * alpha (float): thermal diffusivity constant.
+                             * validation (str, optional): "full" (default) to compute and save the
+                               whole analytical solution, "metrics" to compare each step with the
+                               analytical solution while solving and print a compact error report.
                 - [paths]: Contains file paths for saving solutions.
                              * numerical_solution (str): path to save the numerical solution as a .npy file.
-                             * analytical_solution (str): path to save the analytical solution as a .npy file.
+                             * analytical_solution (str): path to save the analytical solution as a .npy file
+                               (only required by "full" validation).
 
     Behavior:
         1. Reads the configuration file and extracts simulation parameters and output paths.
         2. Checks for stable combinations of spatial and temporal discretizations.
            Raises a ValueError if no stable combinations are found.
         3. For each stable combination, the function:
-           - Computes the numerical solution using the Crank-Nicolson method.
-           - Computes the analytical solution.
-           - Saves both solutions to the specified file paths.
+           - Computes the numerical solution using the Crank-Nicolson method,
+             writing each time step to its file while the solver advances.
+           - With "full" validation, computes the analytical solution and saves it to its file.
+             With "metrics" validation, accumulates the errors against the analytical
+             solution during the run and prints the report instead.
            - Generates and displays plots of the solutions.
 
     Raises:
-        ValueError: If no stable combinations are found for the provided parameters.
+        ValueError: If no stable combinations are found for the provided parameters,
+                    if the validation mode is not recognized, or if the analytical_solution
+                    path is missing with "full" validation.
 
     """
     
@@ -44,9 +90,15 @@ def process_configuration(config_file):
     time = float(config.get('settings', 'time'))
     nt_values = list(map(int, config.get('settings', 'nt_values').split(',')))
     alpha = float(config.get('settings', 'alpha'))
+    validation = config.get('settings', 'validation', fallback='full')
+
+    if validation not in ('full', 'metrics'):
+        raise ValueError(f"Invalid validation mode '{validation}' in {config_file}. Use 'full' or 'metrics'.")
 
     numerical_solution = config.get('paths', 'numerical_solution')
-    analytical_solution = config.get('paths', 'analytical_solution')
+    analytical_solution = config.get('paths', 'analytical_solution', fallback=None)
+    if validation == 'full' and analytical_solution is None:
+        raise ValueError(f"Missing analytical_solution path in {config_file}, required by 'full' validation.")
 
     #verify the presence of stable combinations, then solve and plot for those
     stable_combinations = check_stability(length, time, alpha, nx_values, nt_values)
@@ -58,15 +110,31 @@ def process_configuration(config_file):
 
         print(f"Running simulation with nx={chosen_nx}, nt={chosen_nt}, r={chosen_r}")
 
-        x, w = heat_equation_CN(chosen_length, chosen_nx, chosen_time, chosen_nt, alpha, function_temperature)
-        x, wa = heat_equation_analytical(chosen_length, chosen_nx, chosen_time, chosen_nt, alpha)
+        write, w = npy_writer(numerical_solution, chosen_nx, chosen_nt)
+        consumers = [write]
+        if validation == 'metrics':
+            accumulate, report = analytical_error_metrics(chosen_length, chosen_nx, alpha)
+            consumers.append(accumulate)
 
-        np.save(numerical_solution, w)
-        np.save(analytical_solution, wa)
+        steps = heat_equation_CN_steps(chosen_length, chosen_nx, chosen_time, chosen_nt, alpha, function_temperature)
+        run_pipeline(steps, consumers, buffer_size=8)
+
+        x = np.linspace(0, chosen_length, num=chosen_nx)
+        if validation == 'metrics':
+            errors = report()
+            print(f"Max absolute error: {errors['max_abs_error']:.3e}, "
+                  f"final L2 error: {errors['l2_error'][-1]:.3e}, "
+                  f"max relative error: {np.nanmax(errors['relative_error']):.3e}")
+        else:
+            _, wa = heat_equation_analytical(chosen_length, chosen_nx, chosen_time, chosen_nt, alpha)
+            np.save(analytical_solution, wa)
+            plot_solutions(x, w, wa, chosen_nt, chosen_time, chosen_length, chosen_nx, alpha)
 
-        plot_solutions(x, w, wa, chosen_nt, chosen_time, chosen_length, chosen_nx, alpha)
         plot_surface_solution(x, w, chosen_nt, chosen_time, chosen_length, chosen_nx, alpha)
 
+        #release every reference to the mapping before the next combination reopens the same file
+        del w, write, consumers
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Run heat equation simulation with a specific configuration file.")
     parser.add_argument("config_file", nargs="?", default="configurationA.txt")
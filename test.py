@@ -9,8 +9,11 @@ from function import (
     function_temperature, heat_equation_CN,
     heat_equation_analytical, check_stability,
     create_matrices, apply_boundary_conditions,
-    validate_stability
+    validate_stability, heat_equation_CN_steps,
+    run_pipeline, analytical_error_metrics
 )
+import simulation
+from simulation import npy_writer, process_configuration
 
 #numerical test cases
 numerical_cases = [
@@ -267,6 +270,236 @@ def test_accuracy_against_analytical(parameters):
     assert error < acceptable_error, f"Numerical solution error {error:.3e} exceeds acceptable threshold {acceptable_error:.3e}."
 
 
+@pytest.mark.parametrize("parameters", numerical_cases)
+def test_steps_match_full_solution(parameters):
+    """
+    Test that the streaming solver yields the same profiles as the full Crank-Nicolson solution.
+
+    GIVEN: A set of parameters.
+    WHEN: Iterating over heat_equation_CN_steps and computing heat_equation_CN.
+    THEN: There should be nt steps, with times from 0 to the evolution time and states equal to the columns of w.
+    """
+    length = parameters["length"]
+    nx = parameters["nx"]
+    time = parameters["time"]
+    nt = parameters["nt"]
+    alpha = parameters["alpha"]
+
+    _, w = heat_equation_CN(length, nx, time, nt, alpha, function_temperature)
+    steps = list(heat_equation_CN_steps(length, nx, time, nt, alpha, function_temperature))
+
+    assert len(steps) == nt
+    np.testing.assert_allclose([t for t, _ in steps], np.linspace(0, time, nt))
+    np.testing.assert_array_equal(np.column_stack([state for _, state in steps]), w)
+
+def test_steps_validate_stability():
+    """
+    Test that the streaming solver checks the stability condition when it is called.
+
+    GIVEN: An unstable configuration.
+    WHEN: Calling heat_equation_CN_steps, without iterating over the steps.
+    THEN: A ValueError should be raised.
+    """
+    with pytest.raises(ValueError, match="Unstable configuration"):
+        heat_equation_CN_steps(1.0, 100, 1.0, 2, 0.5, function_temperature)
+
+
+@pytest.mark.parametrize("buffer_size", [0, 1, 8])
+def test_run_pipeline_consumers(buffer_size):
+    """
+    Test that run_pipeline feeds every step to every consumer in order, with and without buffering.
+
+    GIVEN: A stable configuration and two consumers, one collecting the states and one reducing the maximum temperature.
+    WHEN: Running the pipeline on heat_equation_CN_steps.
+    THEN: The collected states should match heat_equation_CN and the returned step should be the last one.
+    """
+    length, nx, time, nt, alpha = 1.0, 20, 0.1, 40, 0.4
+    _, w = heat_equation_CN(length, nx, time, nt, alpha, function_temperature)
+
+    collected = []
+    maximum = []
+    steps = heat_equation_CN_steps(length, nx, time, nt, alpha, function_temperature)
+    t, state = run_pipeline(steps,
+                            [lambda t, state: collected.append(state),
+                             lambda t, state: maximum.append(state.max())],
+                            buffer_size=buffer_size)
+
+    np.testing.assert_array_equal(np.column_stack(collected), w)
+    np.testing.assert_allclose(maximum, w.max(axis=0))
+    assert t == pytest.approx(time)
+    np.testing.assert_array_equal(state, w[:, -1])
+
+@pytest.mark.parametrize("buffer_size", [0, 2])
+def test_run_pipeline_consumer_error(buffer_size):
+    """
+    Test that an error raised by a consumer stops the pipeline and is propagated.
+
+    GIVEN: A consumer that raises after a few steps.
+    WHEN: Running the pipeline.
+    THEN: The error should be raised by run_pipeline.
+    """
+    def monitor(t, state):
+        if t > 0.05:
+            raise RuntimeError("monitor stopped the run")
+
+    steps = heat_equation_CN_steps(1.0, 20, 0.1, 40, 0.4, function_temperature)
+    with pytest.raises(RuntimeError, match="monitor stopped the run"):
+        run_pipeline(steps, [monitor], buffer_size=buffer_size)
+
+
+@pytest.mark.parametrize("filename", ["solution", "solution.npy"])
+def test_npy_writer(tmp_path, filename):
+    """
+    Test that npy_writer stores every step in a .npy file named like np.save would.
+
+    GIVEN: A path with or without the .npy extension.
+    WHEN: Running the pipeline with the npy_writer consumer.
+    THEN: The file solution.npy should exist and contain the numerical solution.
+    """
+    length, nx, time, nt, alpha = 1.0, 20, 0.1, 40, 0.4
+    _, w = heat_equation_CN(length, nx, time, nt, alpha, function_temperature)
+
+    write, _ = npy_writer(str(tmp_path / filename), nx, nt)
+    run_pipeline(heat_equation_CN_steps(length, nx, time, nt, alpha, function_temperature), [write])
+
+    assert [path.name for path in tmp_path.iterdir()] == ["solution.npy"]
+    np.testing.assert_array_equal(np.load(tmp_path / "solution.npy"), w)
+
+
+@pytest.mark.parametrize("parameters", numerical_cases)
+def test_analytical_error_metrics(parameters):
+    """
+    Test that the online error metrics match the errors computed on the full solutions.
+
+    GIVEN: A set of parameters.
+    WHEN: Running the pipeline with the analytical_error_metrics consumer.
+    THEN: The report should match the max absolute error, the per-step L2 error and the
+          per-step relative error computed from heat_equation_CN and heat_equation_analytical.
+    """
+    length = parameters["length"]
+    nx = parameters["nx"]
+    time = parameters["time"]
+    nt = parameters["nt"]
+    alpha = parameters["alpha"]
+
+    _, w = heat_equation_CN(length, nx, time, nt, alpha, function_temperature)
+    _, wa = heat_equation_analytical(length, nx, time, nt, alpha)
+
+    accumulate, report = analytical_error_metrics(length, nx, alpha)
+    run_pipeline(heat_equation_CN_steps(length, nx, time, nt, alpha, function_temperature), [accumulate])
+    errors = report()
+
+    l2_error = np.linalg.norm(w - wa, axis=0)
+    np.testing.assert_allclose(errors["t"], np.linspace(0, time, nt))
+    assert errors["max_abs_error"] == pytest.approx(np.max(np.abs(w - wa)))
+    np.testing.assert_allclose(errors["l2_error"], l2_error, atol=1e-12)
+    np.testing.assert_allclose(errors["relative_error"], l2_error / np.linalg.norm(wa, axis=0), atol=1e-12)
+
+
+def test_analytical_error_metrics_undefined_relative_error():
+    """
+    Test that the relative error is not defined where the analytical solution has zero norm.
+
+    GIVEN: A rod with nx=2, where both points are boundaries and the analytical profile is zero.
+    WHEN: Accumulating the error metrics for one step.
+    THEN: The relative error should be nan, while the absolute errors are still reported.
+    """
+    accumulate, report = analytical_error_metrics(1.0, 2, 0.1)
+    accumulate(0.0, np.zeros(2))
+    errors = report()
+
+    assert np.isnan(errors["relative_error"][0])
+    assert errors["max_abs_error"] == 0.0
+    assert errors["l2_error"][0] == 0.0
+
+def test_analytical_error_metrics_nan_state():
+    """
+    Test that a nan in the numerical state is not reported as an exact match.
+
+    GIVEN: A valid step followed by a step whose state is all nan.
+    WHEN: Accumulating the error metrics.
+    THEN: The maximum absolute error and the errors of the broken step should be nan.
+    """
+    length, nx, alpha = 1.0, 5, 0.1
+    x = np.linspace(0, length, nx)
+    accumulate, report = analytical_error_metrics(length, nx, alpha)
+    accumulate(0.0, np.sin(np.pi * x / length))
+    accumulate(0.1, np.full(nx, np.nan))
+    errors = report()
+
+    assert np.isnan(errors["max_abs_error"])
+    assert np.isnan(errors["l2_error"][-1])
+    assert np.isnan(errors["relative_error"][-1])
+
+
+def test_process_configuration_full(tmp_path, monkeypatch):
+    """
+    Test the default full validation of process_configuration with several stable combinations.
+
+    GIVEN: A configuration with more than one stable combination, all saved to the same paths.
+    WHEN: Processing the configuration.
+    THEN: Both plots should be drawn for every combination and the saved files should contain
+          the numerical and analytical solutions of the last combination.
+    """
+    config_file = tmp_path / "configuration.txt"
+    config_file.write_text(
+        "[settings]\n"
+        "length = 1.0\n"
+        "nx_values = 10,20\n"
+        "time = 0.1\n"
+        "nt_values = 40,60\n"
+        "alpha = 0.4\n"
+        "[paths]\n"
+        f"numerical_solution: {tmp_path / 'numerical.npy'}\n"
+        f"analytical_solution: {tmp_path / 'analytical.npy'}\n"
+    )
+    plots = []
+    monkeypatch.setattr(simulation, "plot_solutions", lambda *args: plots.append("solutions"))
+    monkeypatch.setattr(simulation, "plot_surface_solution", lambda *args: plots.append("surface"))
+
+    process_configuration(str(config_file))
+
+    _, w = heat_equation_CN(1.0, 20, 0.1, 60, 0.4, function_temperature)
+    _, wa = heat_equation_analytical(1.0, 20, 0.1, 60, 0.4)
+    assert plots == ["solutions", "surface"] * 4
+    np.testing.assert_array_equal(np.load(tmp_path / "numerical.npy"), w)
+    np.testing.assert_array_equal(np.load(tmp_path / "analytical.npy"), wa)
+
+
+def test_process_configuration_metrics(tmp_path, monkeypatch, capsys):
+    """
+    Test the metrics validation of process_configuration.
+
+    GIVEN: A configuration with validation = metrics and no analytical_solution path.
+    WHEN: Processing the configuration.
+    THEN: Only the numerical solution should be saved, the comparison plot should not be drawn
+          and an error report should be printed for every stable combination.
+    """
+    config_file = tmp_path / "configuration.txt"
+    config_file.write_text(
+        "[settings]\n"
+        "length = 1.0\n"
+        "nx_values = 20\n"
+        "time = 0.1\n"
+        "nt_values = 40\n"
+        "alpha = 0.4\n"
+        "validation = metrics\n"
+        "[paths]\n"
+        f"numerical_solution: {tmp_path / 'numerical'}\n"
+    )
+    surface_plots = []
+    monkeypatch.setattr(simulation, "plot_solutions", lambda *args: pytest.fail("plot_solutions called"))
+    monkeypatch.setattr(simulation, "plot_surface_solution", lambda *args: surface_plots.append(args))
+
+    process_configuration(str(config_file))
+
+    _, w = heat_equation_CN(1.0, 20, 0.1, 40, 0.4, function_temperature)
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["configuration.txt", "numerical.npy"]
+    np.testing.assert_array_equal(np.load(tmp_path / "numerical.npy"), w)
+    assert len(surface_plots) == 1
+    assert "Max absolute error" in capsys.readouterr().out
+
+
 @settings(deadline=None)
 @given(
     length=st.floats(min_value=1.0, max_value=10.0),  